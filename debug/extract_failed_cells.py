@@ -34,11 +34,53 @@ import argparse
 import shutil
 import re
 import json
+import fcntl
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
 from pathlib import Path
 from datetime import datetime
-import xarray as xr
 import numpy as np
+from netCDF4 import Dataset
+
+
+# Patterns used to rewrite slurm_runner.sh for a retry batch, compiled once
+SLURM_CONFIG_RE = re.compile(r'(-f\s+)(\S+)(\s|$)')
+SLURM_LOG_RE = re.compile(r'(-o\s+)(\S+)(\s|$)')
+SLURM_JOB_NAME_RE = re.compile(r'(--job-name=[^-]+-batch[_-])(\d+)(\s|$)')
+SLURM_PARTITION_RE = re.compile(r'(#SBATCH\s+(?:-p\s+|--partition=))(\S+)(\s|$)')
+SLURM_PARTITION_SPACE_RE = re.compile(r'(#SBATCH\s+--partition\s+)(\S+)(\s|$)')
+SLURM_PARTITION_ANY_RE = re.compile(r'#SBATCH\s+(?:-p\s+|--partition[=\s]+)(\S+)')
+SLURM_FIRST_SBATCH_RE = re.compile(r'(#SBATCH[^\n]+\n)')
+SLURM_TIME_RE = re.compile(r'^#SBATCH\s+(?:--time[=\s]+|-t\s+)[^\n]*\n', re.MULTILINE)
+BATCH_NUM_RE = re.compile(r'batch[_-](\d+)')
+
+# Pattern for config.js values that point inside a batch directory
+CONFIG_BATCH_PATH_RE = re.compile(r'(/batch[_-]\d+)(/.*)?$')
+
+# ioctl request that makes a file share another file's extents (reflink),
+# supported by copy-on-write filesystems such as btrfs and XFS
+FICLONE = 0x40049409
+
+# Files of a retry batch that are rewritten in place after it is created
+# (relative to the batch root), so they must not share data with the source
+RETRY_MODIFIED_FILES = {
+    os.path.join("input", "run-mask.nc"),
+    os.path.join("config", "config.js"),
+    "slurm_runner.sh"
+}
+
+# Names of the run_status codes a failed cell can carry ('NaN' for cells
+# whose status was never computed)
+STATUS_NAMES = {
+    -100: "fail",
+    -5: "timeout",
+    -9999: "_FillValue",
+    'NaN': "not computed"
+}
+
+# Job ID in sbatch output ("Submitted batch job 12345")
+SBATCH_JOB_ID_RE = re.compile(r'(\d+)')
 
 
 def validate_batch_structure(batch_path):
@@ -51,23 +93,29 @@ def validate_batch_structure(batch_path):
     Returns:
         tuple: (is_valid, error_message)
     """
-    if not batch_path.exists():
+    # List the batch root once and check the subdirectories against the
+    # listing, rather than stat'ing each of them separately
+    try:
+        batch_entries = scan_dir_entries(batch_path)
+    except FileNotFoundError:
         return False, f"Batch directory does not exist: {batch_path}"
-    
-    if not batch_path.is_dir():
+    except NotADirectoryError:
         return False, f"Path is not a directory: {batch_path}"
+    except OSError as e:
+        return False, f"Cannot read batch directory: {batch_path} ({e})"
     
     # Check for required subdirectories
     input_dir = batch_path / "input"
     output_dir = batch_path / "output"
     
-    if not input_dir.exists() or not input_dir.is_dir():
+    if "input" not in batch_entries or not batch_entries["input"].is_dir():
         return False, f"Missing input directory: {input_dir}"
     
-    if not output_dir.exists() or not output_dir.is_dir():
+    if "output" not in batch_entries or not batch_entries["output"].is_dir():
         return False, f"Missing output directory: {output_dir}"
     
-    # Check for required files
+    # Check for required files (a single stat each; listing output/ would
+    # cost more than that on batches with many output files)
     run_status_file = output_dir / "run_status.nc"
     run_mask_file = input_dir / "run-mask.nc"
     
@@ -80,6 +128,61 @@ def validate_batch_structure(batch_path):
     return True, None
 
 
+def scan_dir_entries(path):
+    """
+    List a directory with a single os.scandir call.
+    
+    Args:
+        path (Path): Directory to list
+        
+    Returns:
+        dict: Mapping of entry name to os.DirEntry
+    """
+    with os.scandir(path) as it:
+        return {entry.name: entry for entry in it}
+
+
+def entry_exists(entry):
+    """
+    Check whether a directory entry exists, following symlinks like Path.exists().
+    
+    Args:
+        entry (os.DirEntry): Entry from scan_dir_entries, or None if not listed
+        
+    Returns:
+        bool: True if the entry exists
+    """
+    if entry is None:
+        return False
+    # Only a symlink needs an extra stat, to rule out a dangling link
+    return not entry.is_symlink() or os.path.exists(entry.path)
+
+
+def prefetch_file(path):
+    """
+    Ask the kernel to start reading a file into the page cache.
+    
+    Lets the read of a cold file on the cluster filesystem overlap with
+    the Python-side setup before it is actually opened. Silently does
+    nothing where posix_fadvise is unavailable or fails.
+    
+    Args:
+        path (Path): File to prefetch
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
 def identify_failed_cells(batch_path):
     """
     Identify failed cells by reading run_status.nc and run-mask.nc.
@@ -94,66 +197,81 @@ def identify_failed_cells(batch_path):
     Returns:
         tuple: (run_status_array, run_mask_array, stats_dict) or (None, None, None) on error
         stats_dict contains: total_cells, masked_cells, successful_cells, failed_cells, 
-                            failed_indices (list of tuples)
+                            failed_indices (np.ndarray of flat cell offsets, see
+                            failed_indices_2d), failed_status_codes (tuple of
+                            sorted code and count arrays), failed_nan_cells,
+                            status_masks (success and failed boolean masks,
+                            see count_run_mask_changes)
     """
     try:
         # Paths to files
         run_status_file = batch_path / "output" / "run_status.nc"
         run_mask_file = batch_path / "input" / "run-mask.nc"
         
-        # Read run_status
-        ds_status = xr.open_dataset(run_status_file, decode_times=False)
-        run_status = ds_status['run_status'].values
+        # Start both reads early; the mask file is not needed until later
+        prefetch_file(run_status_file)
+        prefetch_file(run_mask_file)
         
-        # Read run-mask
-        ds_mask = xr.open_dataset(run_mask_file, decode_times=False)
-        run_mask = ds_mask['run'].values
+        # Read run_status and run-mask directly, decoded as xarray would
+        run_status = read_decoded_variable(run_status_file, 'run_status')
+        run_mask = read_decoded_variable(run_mask_file, 'run')
         
         # Validate shapes match
         if run_status.shape != run_mask.shape:
             print(f"Error: Shape mismatch!", file=sys.stderr)
             print(f"  run_status shape: {run_status.shape}", file=sys.stderr)
             print(f"  run_mask shape: {run_mask.shape}", file=sys.stderr)
-            ds_status.close()
-            ds_mask.close()
             return None, None, None
         
         # Calculate statistics
         total_cells = run_status.size
         
+        # Classify every cell with just two comparisons against run_status and
+        # derive all counts from these masks instead of re-scanning the array
+        masked_mask = run_status == 0
+        success_mask = run_status == 100
+        
         # Masked cells (originally not meant to run)
-        masked_cells = np.sum(run_status == 0)
+        masked_cells = np.count_nonzero(masked_mask)
         
         # Successful cells
-        successful_cells = np.sum(run_status == 100)
+        successful_cells = np.count_nonzero(success_mask)
         
         # Failed cells (status != 100 AND status != 0, including NaN values)
-        # NaN values indicate something went wrong and should be treated as failures
-        failed_mask = (run_status != 100) & (run_status != 0)
-        # Also include NaN values as failures
-        failed_mask = failed_mask | np.isnan(run_status)
+        # NaN values indicate something went wrong and should be treated as failures.
+        # NaN compares unequal to both 0 and 100, so it is already part of this mask.
+        # Built in a single buffer (or, then not in place) rather than one
+        # temporary array per operator.
+        failed_mask = np.logical_or(masked_mask, success_mask)
+        np.logical_not(failed_mask, out=failed_mask)
         
         # Count all failed cells
-        failed_cells_total = np.sum(failed_mask)
-        
-        # Count only failed cells that were supposed to run (run_mask=1)
-        failed_cells_to_retry = np.sum(failed_mask & (run_mask == 1))
+        failed_cells_total = np.count_nonzero(failed_mask)
         failed_cells = failed_cells_total
         
-        # Get indices of failed cells
-        failed_indices = np.argwhere(failed_mask)
+        # Get indices of failed cells as flat offsets into the grid; (Y, X)
+        # indices are only built on demand by failed_indices_2d
+        failed_flat = np.flatnonzero(failed_mask)
+        if run_status.size < 2**31:
+            failed_flat = failed_flat.astype(np.int32)
+        
+        # Count only failed cells that were supposed to run (run_mask=1);
+        # the mask is only looked up at the failed cells, not across the grid
+        failed_cells_to_retry = np.count_nonzero(run_mask.ravel()[failed_flat] == 1)
+        
+        # Status codes of failed cells, gathered once through the flat offsets
+        failed_status_codes = run_status.ravel()[failed_flat]
         
         # Get unique status codes for failed cells
-        failed_status_codes = run_status[failed_mask]
-        unique_codes = {}
-        for code in np.unique(failed_status_codes):
-            # Handle NaN separately
-            if np.isnan(code):
-                count = np.sum(np.isnan(failed_status_codes))
-                unique_codes['NaN'] = int(count)
-            else:
-                count = np.sum(failed_status_codes == code)
-                unique_codes[int(code)] = int(count)
+        # (NaN is split off first; the rest are counted in one sorting pass)
+        codes = failed_status_codes
+        nan_count = 0
+        if np.issubdtype(failed_status_codes.dtype, np.floating):
+            nan_codes = np.isnan(failed_status_codes)
+            nan_count = np.count_nonzero(nan_codes)
+            if nan_count:
+                codes = failed_status_codes[~nan_codes]
+        codes, counts = np.unique(codes.astype(np.int64), return_counts=True)
         
         stats = {
             'total_cells': int(total_cells),
@@ -161,13 +279,12 @@ def identify_failed_cells(batch_path):
             'successful_cells': int(successful_cells),
             'failed_cells': int(failed_cells),
             'failed_cells_to_retry': int(failed_cells_to_retry),
-            'failed_indices': failed_indices.tolist(),
-            'failed_status_codes': unique_codes
+            'failed_indices': failed_flat,
+            'failed_status_codes': (codes, counts),
+            'failed_nan_cells': int(nan_count),
+            'status_masks': (success_mask, failed_mask)
         }
         
-        ds_status.close()
-        ds_mask.close()
-        
         return run_status, run_mask, stats
         
     except Exception as e:
@@ -175,15 +292,68 @@ def identify_failed_cells(batch_path):
         return None, None, None
 
 
-def create_retry_batch(batch_path, retry_path, force=False, dry_run=False):
+def failed_indices_2d(stats, shape, limit=None):
+    """
+    Convert the flat failed-cell offsets stored in stats into N-D indices.
+    
+    Args:
+        stats (dict): Statistics dictionary returned by identify_failed_cells
+        shape (tuple): Shape of the run_status grid
+        limit (int): If given, only convert the first `limit` failed cells
+        
+    Returns:
+        np.ndarray: Array of shape (n, ndim) with one row of indices per failed cell
+    """
+    failed_flat = stats['failed_indices'][:limit]
+    return np.column_stack(np.unravel_index(failed_flat, shape))
+
+
+def clone_file(src, dst):
+    """
+    Copy a file as a reflink where the filesystem supports it.
+    
+    A reflink shares the data blocks of src until either file is modified, so
+    it costs no data I/O and is safe for files that are changed in place later.
+    Falls back to shutil.copy2 on filesystems without reflink support. Used as
+    the copy_function for shutil.copytree and wherever a single file is copied.
+    Raises shutil.SameFileError, before dst is opened for writing, if src and
+    dst are the same file (e.g. hardlinks of each other), since truncating dst
+    would also destroy src.
+    
+    Args:
+        src (str or Path): File to copy
+        dst (str or Path): Destination path
+        
+    Returns:
+        str or Path: Destination path
+    """
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        raise shutil.SameFileError(f"{src} and {dst} are the same file")
+    
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError:
+        return shutil.copy2(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+
+def create_retry_batch(batch_path, retry_path, force=False, dry_run=False, link_inputs=False):
     """
     Create a retry batch by copying the entire batch structure.
     
+    With link_inputs, files under input/ are hardlinked to the source batch
+    instead, so they cost no data I/O or disk space, but an in-place edit of
+    one of them in the retry batch also changes the source batch. Files the
+    retry batch rewrites itself (RETRY_MODIFIED_FILES) are always copied.
+    
     Args:
         batch_path (Path): Path to the source batch directory
         retry_path (Path): Path to the retry directory
         force (bool): If True, overwrite existing retry directory
         dry_run (bool): If True, don't actually create files
+        link_inputs (bool): If True, hardlink input files instead of copying them
         
     Returns:
         bool: True if successful, False otherwise
@@ -208,15 +378,52 @@ def create_retry_batch(batch_path, retry_path, force=False, dry_run=False):
     try:
         print(f"Copying batch structure to: {retry_path}")
         
-        # Copy the entire batch directory, but ignore the retry directory if it exists
-        def ignore_retry_dir(directory, files):
-            """Ignore function to skip the retry directory during copy."""
-            # If we're in the batch root and there's a 'retry' folder, ignore it
-            if Path(directory) == batch_path and 'retry' in files:
-                return ['retry']
-            return []
-        
-        shutil.copytree(batch_path, retry_path, ignore=ignore_retry_dir, dirs_exist_ok=False)
+        def copy_one_file(src, dst):
+            """Copy a file, or link it if it is a shared input file."""
+            rel_path = os.path.relpath(src, batch_path)
+            if (link_inputs and rel_path.startswith("input" + os.sep)
+                    and rel_path not in RETRY_MODIFIED_FILES):
+                link_or_copy(src, dst)
+            else:
+                clone_file(src, dst)
+        
+        # Walk the entire batch directory, but ignore the retry directory if it
+        # exists. output/ is copied too: restart runs (e.g. scenario batches)
+        # read their restart-*.nc files from it and keep writing into the
+        # existing outputs. Like shutil.copytree, symlinks are followed and
+        # copied as regular files and directories. Every directory is created
+        # during the walk, so the copies below never race on creating one
+        def raise_walk_error(error):
+            """Fail on unreadable directories, as copytree did, instead of skipping them."""
+            raise error
+        
+        dir_pairs = []
+        file_pairs = []
+        for src_dir, dirs, files in os.walk(batch_path, onerror=raise_walk_error, followlinks=True):
+            rel_dir = os.path.relpath(src_dir, batch_path)
+            if rel_dir == os.curdir:
+                # If we're in the batch root and there's a 'retry' folder, ignore it
+                dirs[:] = [d for d in dirs if d != 'retry']
+                files = [f for f in files if f != 'retry']
+            dst_dir = os.path.normpath(os.path.join(retry_path, rel_dir))
+            os.makedirs(dst_dir)
+            dir_pairs.append((src_dir, dst_dir))
+            file_pairs.extend((os.path.join(src_dir, f), os.path.join(dst_dir, f)) for f in files)
+        
+        # The files are handed to a thread pool so copies overlap on parallel
+        # filesystems (file copies release the GIL, unlike netCDF access).
+        # Collecting every result re-raises the first copy error, if any
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+            copy_futures = [executor.submit(copy_one_file, src, dst) for src, dst in file_pairs]
+            for future in copy_futures:
+                future.result()
+        
+        # Directory permissions and times are copied only once every file is in
+        # place: a read-only source directory would otherwise block the copies
+        # into it, and creating files would change the copied mtimes.
+        # Subdirectories come after their parents in the walk, so go backwards
+        for src_dir, dst_dir in reversed(dir_pairs):
+            shutil.copystat(src_dir, dst_dir)
         
         print(f"✓ Batch structure copied successfully")
         return True
@@ -226,7 +433,47 @@ def create_retry_batch(batch_path, retry_path, force=False, dry_run=False):
         return False
 
 
-def update_retry_run_mask(retry_path, run_status, run_mask_original, dry_run=False):
+def count_run_mask_changes(run_status, run_mask, status_masks=None):
+    """
+    Count the cells a retry run-mask update disables and keeps enabled.
+    
+    Args:
+        run_status (np.ndarray): Array of run status codes
+        run_mask (np.ndarray): Run mask array (run=1 for cells that run)
+        status_masks (tuple): (success_mask, failed_mask) already built from
+            run_status by identify_failed_cells; derived here if None
+        
+    Returns:
+        tuple: (success_mask, cells_disabled, cells_enabled)
+    """
+    # Each comparison is made once and shared: both counts use the enabled
+    # mask, and the successful mask is also what the caller writes back
+    enabled_mask = run_mask == 1
+    
+    if status_masks is not None:
+        success_mask, failed_mask = status_masks
+        cells_disabled = np.count_nonzero(success_mask & enabled_mask)
+        cells_enabled = np.count_nonzero(failed_mask & enabled_mask)
+        return success_mask, int(cells_disabled), int(cells_enabled)
+    
+    success_mask = run_status == 100
+    
+    cells_disabled = np.count_nonzero(success_mask & enabled_mask)
+    
+    # Failed cells: not successful (!=100), not masked (!=0), including NaN values
+    # (NaN compares unequal to both, so no separate isnan pass is needed).
+    # All steps after the first comparison reuse its buffer.
+    failed_cells_mask = np.equal(run_status, 0)
+    np.logical_or(failed_cells_mask, success_mask, out=failed_cells_mask)
+    np.logical_not(failed_cells_mask, out=failed_cells_mask)
+    np.logical_and(failed_cells_mask, enabled_mask, out=failed_cells_mask)
+    cells_enabled = np.count_nonzero(failed_cells_mask)
+    
+    return success_mask, int(cells_disabled), int(cells_enabled)
+
+
+def update_retry_run_mask(retry_path, run_status, run_mask_original, dry_run=False,
+                          status_masks=None):
     """
     Update the run-mask.nc in the retry batch to disable successful cells.
     
@@ -239,6 +486,8 @@ def update_retry_run_mask(retry_path, run_status, run_mask_original, dry_run=Fal
         run_status (np.ndarray): Array of run status codes
         run_mask_original (np.ndarray): Original run mask array
         dry_run (bool): If True, don't actually modify files
+        status_masks (tuple): Success and failed masks from identify_failed_cells,
+            reused instead of comparing run_status again
         
     Returns:
         tuple: (success, cells_disabled, cells_enabled)
@@ -248,17 +497,8 @@ def update_retry_run_mask(retry_path, run_status, run_mask_original, dry_run=Fal
         
         if dry_run:
             # Use the original run_mask for calculation
-            run_mask = run_mask_original
-            
-            # Calculate changes
-            cells_to_disable = (run_status == 100) & (run_mask == 1)
-            
-            # Failed cells: not successful (!=100), not masked (!=0), including NaN values
-            failed_cells_mask = ((run_status != 100) & (run_status != 0)) | np.isnan(run_status)
-            cells_to_keep_enabled = failed_cells_mask & (run_mask == 1)
-            
-            cells_disabled = int(np.sum(cells_to_disable))
-            cells_enabled = int(np.sum(cells_to_keep_enabled))
+            _, cells_disabled, cells_enabled = count_run_mask_changes(
+                run_status, run_mask_original, status_masks)
             
             print(f"[DRY RUN] Would update run-mask.nc:")
             print(f"  - Would disable {cells_disabled} successful cells")
@@ -266,39 +506,25 @@ def update_retry_run_mask(retry_path, run_status, run_mask_original, dry_run=Fal
             
             return True, cells_disabled, cells_enabled
         
-        # Read the run-mask
-        ds = xr.open_dataset(run_mask_file, decode_times=False)
-        run_mask = ds['run'].values.copy()
-        
-        # Track changes
-        cells_to_disable = (run_status == 100) & (run_mask == 1)
-        
-        # Failed cells: not successful (!=100), not masked (!=0), including NaN values
-        # For NaN values, standard comparisons don't work, so we need to check explicitly
-        failed_cells_mask = ((run_status != 100) & (run_status != 0)) | np.isnan(run_status)
-        cells_to_keep_enabled = failed_cells_mask & (run_mask == 1)
-        
-        cells_disabled = int(np.sum(cells_to_disable))
-        cells_enabled = int(np.sum(cells_to_keep_enabled))
-        
-        # Update run mask: set run=0 where status=100 (successful cells)
-        run_mask[run_status == 100] = 0
-        
-        # Create updated dataset
-        ds_updated = ds.copy()
-        ds_updated['run'].values[:] = run_mask
-        
-        # Close the original dataset to release any locks
-        ds.close()
-        
-        # Write to a temporary file first
-        temp_file = run_mask_file.parent / f".{run_mask_file.name}.tmp"
-        ds_updated.to_netcdf(temp_file)
-        ds_updated.close()
-        
-        # Remove the original and rename the temp file
-        run_mask_file.unlink()
-        temp_file.rename(run_mask_file)
+        # Update the run variable in place; the rest of the file is left untouched
+        with Dataset(run_mask_file, 'r+') as nc:
+            run_var = nc.variables['run']
+            # Raw values (no masked array, no unpacking), so the variable is
+            # written back exactly as stored apart from the disabled cells
+            run_var.set_auto_maskandscale(False)
+            run_mask = run_var[:]
+            
+            # Track changes
+            success_mask, cells_disabled, cells_enabled = count_run_mask_changes(
+                run_status, run_mask, status_masks)
+            
+            # Update run mask: set run=0 where status=100 (successful cells).
+            # Nothing is written if every successful cell is already disabled
+            to_disable = success_mask & (run_mask != 0)
+            if to_disable.any():
+                # Masked store in one contiguous pass, no gather/scatter indices
+                np.copyto(run_mask, 0, where=to_disable)
+                run_var[:] = run_mask
         
         print(f"✓ Updated run-mask.nc:")
         print(f"  - Disabled {cells_disabled} successful cells")
@@ -311,6 +537,21 @@ def update_retry_run_mask(retry_path, run_status, run_mask_original, dry_run=Fal
         return False, 0, 0
 
 
+def extract_batch_num(text, default=None):
+    """
+    Extract the batch number from a batch_XX or batch-XX path or name.
+    
+    Args:
+        text (str): Text to search
+        default: Value to return when no batch number is found
+        
+    Returns:
+        str: The batch number (e.g. '18'), or default
+    """
+    batch_match = BATCH_NUM_RE.search(text)
+    return batch_match.group(1) if batch_match else default
+
+
 def update_retry_slurm_runner(retry_path, batch_path, dry_run=False, partition='dask', nowalltime=False):
     """
     Update the slurm_runner.sh file in the retry batch to use retry paths.
@@ -339,8 +580,13 @@ def update_retry_slurm_runner(retry_path, batch_path, dry_run=False, partition='
         return False
     
     try:
-        # Get absolute path of retry_path
-        retry_path_abs = retry_path.resolve()
+        # Get absolute path of retry_path, and the replacement paths built
+        # from it, once rather than per match. main already resolves the batch
+        # path, so only make it absolute here instead of resolving it again
+        retry_path_abs = Path(os.path.abspath(retry_path))
+        config_path_new = str(retry_path_abs / "config" / "config.js")
+        # Logs are typically at the same level as the batch directory
+        logs_dir = str(retry_path_abs.parent)
         
         # Read the file
         with open(slurm_runner_file, 'r') as f:
@@ -350,44 +596,30 @@ def update_retry_slurm_runner(retry_path, batch_path, dry_run=False, partition='
         
         # Update the config file path (-f)
         # Replace entire old path with retry_path/config/config.js
-        config_pattern = r'(-f\s+)([^\s]+)(\s|$)'
-        
         def replace_config_path(match):
             prefix = match.group(1)  # -f 
             old_path = match.group(2)  # old full path
             suffix = match.group(3)  # whitespace or end of line
             
             # Replace with absolute retry_path + /config/config.js
-            new_path = str(retry_path_abs / "config" / "config.js")
-            return f"{prefix}{new_path}{suffix}"
-        
-        content = re.sub(config_pattern, replace_config_path, content)
+            return f"{prefix}{config_path_new}{suffix}"
         
         # Update the log file path (-o)
         # Extract batch number from the old path, then replace with retry_path's logs
-        log_pattern = r'(-o\s+)([^\s]+)(\s|$)'
-        
         def replace_log_path(match):
             prefix = match.group(1)  # -o 
             old_path = match.group(2)  # old full path
             suffix = match.group(3)  # whitespace or end of line
             
             # Extract batch number from old path (look for batch-XX or batch_XX)
-            batch_match = re.search(r'batch[_-](\d+)', old_path)
-            batch_num = batch_match.group(1) if batch_match else "retry"
+            batch_num = extract_batch_num(old_path, "retry")
             
             # Replace with retry_path's parent logs directory + batch-XX-retry
-            # Logs are typically at the same level as the batch directory
-            logs_dir = retry_path_abs.parent
-            new_path = str(logs_dir / f"batch-{batch_num}-retry")
+            new_path = os.path.join(logs_dir, f"batch-{batch_num}-retry")
             return f"{prefix}{new_path}{suffix}"
         
-        content = re.sub(log_pattern, replace_log_path, content)
-        
         # Also update job name if it exists
         # Pattern: --job-name=...-batch-XX or --job-name=...-batch_XX
-        job_name_pattern = r'(--job-name=[^-]+-batch[_-])(\d+)(\s|$)'
-        
         def replace_job_name(match):
             prefix = match.group(1)  # --job-name=...-batch- or --job-name=...-batch_
             batch_num = match.group(2)  # 18
@@ -397,73 +629,74 @@ def update_retry_slurm_runner(retry_path, batch_path, dry_run=False, partition='
             new_name = f"{prefix}{batch_num}-retry{suffix}"
             return new_name
         
-        content = re.sub(job_name_pattern, replace_job_name, content)
-        
         # Update partition to the specified partition (replace any existing partition)
         # Match -p PARTITION, --partition=PARTITION, and --partition PARTITION formats
         # Pattern matches: #SBATCH -p PARTITION, #SBATCH --partition=PARTITION, #SBATCH --partition PARTITION
         partition_found = False
         
-        # Pattern 1: #SBATCH -p PARTITION or #SBATCH --partition=PARTITION
-        partition_pattern = r'(#SBATCH\s+(?:-p\s+|--partition=))([^\s]+)(\s|$)'
-        
         def replace_partition(match):
             nonlocal partition_found
-            prefix = match.group(1)  # #SBATCH -p or #SBATCH --partition=
+            prefix = match.group(1)  # #SBATCH -p, #SBATCH --partition= or #SBATCH --partition 
             old_partition = match.group(2)  # old partition name
             suffix = match.group(3)  # whitespace or end of line
             partition_found = True
             return f"{prefix}{partition}{suffix}"
         
-        content = re.sub(partition_pattern, replace_partition, content)
-        
-        # Pattern 2: #SBATCH --partition PARTITION (with space instead of =)
-        partition_space_pattern = r'(#SBATCH\s+--partition\s+)([^\s]+)(\s|$)'
+        # Rewrite the script in a single pass over its lines. Each line is only
+        # handed to the patterns whose literal marker it contains, so most lines
+        # are copied through without any regex work.
+        time_lines_removed = 0
+        partition_insert_pos = None
+        new_lines = []
+        for line in content.splitlines(True):
+            is_sbatch = '#SBATCH' in line
+            
+            # Remember where the first #SBATCH line ends, in case a partition
+            # directive has to be added after it
+            if is_sbatch and partition_insert_pos is None and SLURM_FIRST_SBATCH_RE.search(line):
+                partition_insert_pos = len(new_lines) + 1
+            
+            # Remove #SBATCH --time lines if nowalltime is True
+            # Pattern matches: #SBATCH --time=..., #SBATCH --time ..., #SBATCH -t ...
+            if nowalltime and is_sbatch and SLURM_TIME_RE.match(line):
+                time_lines_removed += 1
+                if partition_insert_pos == len(new_lines) + 1:
+                    partition_insert_pos -= 1
+                continue
+            
+            if '-f' in line:
+                line = SLURM_CONFIG_RE.sub(replace_config_path, line)
+            if '-o' in line:
+                line = SLURM_LOG_RE.sub(replace_log_path, line)
+            if '--job-name=' in line:
+                line = SLURM_JOB_NAME_RE.sub(replace_job_name, line)
+            if is_sbatch:
+                line = SLURM_PARTITION_RE.sub(replace_partition, line)
+                line = SLURM_PARTITION_SPACE_RE.sub(replace_partition, line)
+            
+            new_lines.append(line)
         
-        def replace_partition_space(match):
-            nonlocal partition_found
-            prefix = match.group(1)  # #SBATCH --partition 
-            old_partition = match.group(2)  # old partition name
-            suffix = match.group(3)  # whitespace or end of line
+        # If no partition directive exists, add one after the first #SBATCH line
+        if not partition_found and partition_insert_pos is not None:
+            new_lines.insert(partition_insert_pos, f"#SBATCH -p {partition}\n")
             partition_found = True
-            return f"{prefix}{partition}{suffix}"
         
-        content = re.sub(partition_space_pattern, replace_partition_space, content)
-        
-        # If no partition directive exists, add one after the first #SBATCH line
-        if not partition_found:
-            # Find the first #SBATCH line and add partition after it
-            first_sbatch_match = re.search(r'(#SBATCH[^\n]+\n)', content)
-            if first_sbatch_match:
-                # Insert partition directive after the first #SBATCH line
-                insert_pos = first_sbatch_match.end()
-                content = content[:insert_pos] + f"#SBATCH -p {partition}\n" + content[insert_pos:]
-                partition_found = True
-        
-        # Remove #SBATCH --time lines if nowalltime is True
-        time_lines_removed = 0
-        if nowalltime:
-            # Pattern matches: #SBATCH --time=..., #SBATCH --time ..., #SBATCH -t ...
-            # Match the entire line including newline
-            time_pattern = r'^#SBATCH\s+(?:--time[=\s]+|-t\s+)[^\n]*\n'
-            time_matches = re.findall(time_pattern, content, re.MULTILINE)
-            time_lines_removed = len(time_matches)
-            content = re.sub(time_pattern, '', content, flags=re.MULTILINE)
+        content = ''.join(new_lines)
         
         if content == original_content:
             print(f"Warning: No changes detected in slurm_runner.sh", file=sys.stderr)
             return True
         
+        # Log path reported in the summary, from the first batch number in the script
+        batch_num = extract_batch_num(original_content, "retry")
+        log_path_new = os.path.join(logs_dir, f"batch-{batch_num}-retry")
+        
         if dry_run:
             print(f"[DRY RUN] Would update slurm_runner.sh:")
-            config_new = str(retry_path_abs / "config" / "config.js")
-            print(f"  - Would replace config path (-f) with: {config_new}")
-            batch_match = re.search(r'batch[_-](\d+)', original_content)
-            batch_num = batch_match.group(1) if batch_match else "retry"
-            log_new = str(retry_path_abs.parent / f"batch-{batch_num}-retry")
-            print(f"  - Would replace log path (-o) with: {log_new}")
+            print(f"  - Would replace config path (-f) with: {config_path_new}")
+            print(f"  - Would replace log path (-o) with: {log_path_new}")
             # Check if partition exists in original content
-            partition_match = re.search(r'#SBATCH\s+(?:-p\s+|--partition[=\s]+)([^\s]+)', original_content)
+            partition_match = SLURM_PARTITION_ANY_RE.search(original_content)
             if partition_match:
                 old_partition = partition_match.group(1)
                 print(f"  - Would change partition from '{old_partition}' to '{partition}'")
@@ -471,8 +704,7 @@ def update_retry_slurm_runner(retry_path, batch_path, dry_run=False, partition='
                 print(f"  - Would add partition '{partition}'")
             # Check for time lines if nowalltime
             if nowalltime:
-                time_pattern = r'^#SBATCH\s+(?:--time[=\s]+|-t\s+)[^\n]*\n'
-                time_matches = re.findall(time_pattern, original_content, re.MULTILINE)
+                time_matches = SLURM_TIME_RE.findall(original_content)
                 if time_matches:
                     print(f"  - Would remove {len(time_matches)} #SBATCH --time line(s)")
             return True
@@ -481,17 +713,12 @@ def update_retry_slurm_runner(retry_path, batch_path, dry_run=False, partition='
         with open(slurm_runner_file, 'w') as f:
             f.write(content)
         
-        config_new = str(retry_path_abs / "config" / "config.js")
-        batch_match = re.search(r'batch[_-](\d+)', original_content)
-        batch_num = batch_match.group(1) if batch_match else "retry"
-        log_new = str(retry_path_abs.parent / f"batch-{batch_num}-retry")
-        
         print(f"✓ Updated slurm_runner.sh:")
-        print(f"  - Replaced config path (-f) with: {config_new}")
-        print(f"  - Replaced log path (-o) with: {log_new}")
+        print(f"  - Replaced config path (-f) with: {config_path_new}")
+        print(f"  - Replaced log path (-o) with: {log_path_new}")
         # Check if partition was changed
-        partition_match_orig = re.search(r'#SBATCH\s+(?:-p\s+|--partition[=\s]+)([^\s]+)', original_content)
-        partition_match_new = re.search(r'#SBATCH\s+(?:-p\s+|--partition[=\s]+)([^\s]+)', content)
+        partition_match_orig = SLURM_PARTITION_ANY_RE.search(original_content)
+        partition_match_new = SLURM_PARTITION_ANY_RE.search(content)
         if partition_match_orig:
             old_partition = partition_match_orig.group(1)
             if partition_match_new and partition_match_new.group(1) == partition:
@@ -531,55 +758,55 @@ def update_retry_config(retry_path, batch_path, dry_run=False):
         return False
     
     try:
-        # Get absolute paths
-        retry_path_abs = retry_path.resolve()
-        batch_path_abs = batch_path.resolve()
+        # Get absolute path (already resolved by main, so no symlink walk)
+        retry_path_str = os.path.abspath(retry_path)
         
         # Read the config file
         with open(config_file, 'r') as f:
             config_data = json.load(f)
         
-        original_config = json.dumps(config_data, indent=4)
         paths_updated = 0
         
-        # Function to recursively update paths in the config
-        def update_paths(obj, path_key=""):
-            nonlocal paths_updated
-            if isinstance(obj, dict):
-                for key, value in obj.items():
-                    current_path = f"{path_key}.{key}" if path_key else key
-                    if isinstance(value, str) and value:
-                        # Check if this is a path that needs updating
-                        # Look for paths containing /batch_XX/ or /batch-XX/
-                        # Pattern: .../batch_XX/... or .../batch-XX/...
-                        match = re.search(r'(/batch[_-]\d+)(/.*)?$', value)
-                        if match:
-                            batch_part = match.group(1)  # /batch_18 or /batch-18
-                            relative_part = match.group(2) if match.group(2) else ""  # /input/... or ""
-                            
-                            # Replace everything up to and including batch_XX with retry_path
-                            # Then append the relative part (which includes the leading / if present)
-                            new_path = str(retry_path_abs) + relative_part
-                            if value != new_path:
-                                obj[key] = new_path
-                                paths_updated += 1
-                        # Also handle /tmp/batch_XX pattern (standalone, not a directory path)
-                        elif value.startswith('/tmp/batch_') or value.startswith('/tmp/batch-'):
-                            batch_num_match = re.search(r'batch[_-](\d+)', value)
-                            if batch_num_match:
-                                batch_num = batch_num_match.group(1)
-                                new_path = f"/tmp/batch_{batch_num}_retry"
-                                if value != new_path:
-                                    obj[key] = new_path
-                                    paths_updated += 1
-                    elif isinstance(value, (dict, list)):
-                        update_paths(value, current_path)
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj):
-                    update_paths(item, f"{path_key}[{i}]")
-        
-        # Update all paths in the config
-        update_paths(config_data)
+        # Walk the config with an explicit stack of containers; only string
+        # values held directly by a dict are candidates for rewriting
+        pending = [config_data]
+        while pending:
+            obj = pending.pop()
+            if isinstance(obj, list):
+                pending.extend(item for item in obj if isinstance(item, (dict, list)))
+                continue
+            
+            for key, value in obj.items():
+                if isinstance(value, (dict, list)):
+                    pending.append(value)
+                    continue
+                
+                # Both patterns below need '/batch', so skip everything else
+                # before doing any regex work
+                if not isinstance(value, str) or '/batch' not in value:
+                    continue
+                
+                # Check if this is a path that needs updating
+                # Look for paths containing /batch_XX/ or /batch-XX/
+                # Pattern: .../batch_XX/... or .../batch-XX/...
+                match = CONFIG_BATCH_PATH_RE.search(value)
+                if match:
+                    relative_part = match.group(2) if match.group(2) else ""  # /input/... or ""
+                    
+                    # Replace everything up to and including batch_XX with retry_path
+                    # Then append the relative part (which includes the leading / if present)
+                    new_path = retry_path_str + relative_part
+                    if value != new_path:
+                        obj[key] = new_path
+                        paths_updated += 1
+                # Also handle /tmp/batch_XX pattern (standalone, not a directory path)
+                elif value.startswith('/tmp/batch_') or value.startswith('/tmp/batch-'):
+                    batch_num = extract_batch_num(value)
+                    if batch_num:
+                        new_path = f"/tmp/batch_{batch_num}_retry"
+                        if value != new_path:
+                            obj[key] = new_path
+                            paths_updated += 1
         
         if paths_updated == 0:
             print(f"Warning: No paths updated in config.js", file=sys.stderr)
@@ -632,13 +859,6 @@ def create_failed_cells_report(batch_path, retry_status, retry_failed_mask):
         # Create report file path
         report_file = batch_path / "failed_cells_report.txt"
         
-        # Status code descriptions
-        status_descriptions = {
-            -100: "fail",
-            -5: "timeout",
-            -9999: "_FillValue"
-        }
-        
         # Group failed cells by status code for better readability
         failed_by_status = {}
         for idx, status_code in zip(failed_indices, failed_status_codes):
@@ -648,7 +868,7 @@ def create_failed_cells_report(batch_path, retry_status, retry_failed_mask):
                 status_desc = "not computed"
             else:
                 status_key = int(status_code)
-                status_desc = status_descriptions.get(status_key, "unknown")
+                status_desc = STATUS_NAMES.get(status_key, "unknown")
             
             if status_key not in failed_by_status:
                 failed_by_status[status_key] = {'desc': status_desc, 'cells': []}
@@ -695,7 +915,295 @@ def create_failed_cells_report(batch_path, retry_status, retry_failed_mask):
         return None
 
 
-def merge_retry_results(batch_path, retry_path, dry_run=False):
+def bool_buffer(buffer, shape):
+    """
+    View the front of a reusable flat boolean buffer with the given shape.
+    
+    Args:
+        buffer (np.ndarray): Flat boolean buffer, or None to allocate a new array
+        shape (tuple): Shape of the array needed
+        
+    Returns:
+        np.ndarray: Boolean array of the given shape (contents undefined)
+    """
+    if buffer is None:
+        return np.empty(shape, dtype=bool)
+    return buffer[:int(np.prod(shape))].reshape(shape)
+
+
+def retry_valid_mask(var, data, exclude_zero=False, out=None, scratch=None):
+    """
+    Build the mask of cells holding valid data in a raw retry variable.
+    
+    Missing data is what xarray decoding would turn into NaN: the variable's
+    _FillValue and missing_value, plus NaN itself for floating point types.
+    
+    Args:
+        var (netCDF4.Variable): Retry variable, for its fill attributes
+        data (np.ndarray): Raw (unmasked, unscaled) values read from var
+        exclude_zero (bool): Also treat 0 (masked cell) as missing
+        out (np.ndarray): Optional flat boolean buffer of at least data.size
+                          elements to build the mask in (reused across calls)
+        scratch (np.ndarray): Optional flat boolean buffer of the same kind for
+                              the intermediate comparisons
+        
+    Returns:
+        np.ndarray: Boolean mask, True where the retry data is valid
+                    (a view into out if given)
+    """
+    # Values marking missing data
+    missing_values = [0] if exclude_zero else []
+    var_attrs = var.ncattrs()
+    for attr in ('_FillValue', 'missing_value'):
+        if attr in var_attrs:
+            missing_values.extend(np.ravel(var.getncattr(attr)))
+    
+    # Every comparison is combined into one boolean buffer in place, so no
+    # temporary masks pile up however many missing values there are
+    valid_mask = bool_buffer(out, data.shape)
+    if np.issubdtype(data.dtype, np.floating):
+        np.isnan(data, out=valid_mask)
+        np.logical_not(valid_mask, out=valid_mask)
+    else:
+        # Integer types cannot hold NaN, start with all values valid
+        valid_mask.fill(True)
+    
+    if missing_values:
+        scratch = bool_buffer(scratch, data.shape)
+        for missing_value in missing_values:
+            np.not_equal(data, missing_value, out=scratch)
+            np.logical_and(valid_mask, scratch, out=valid_mask)
+    
+    return valid_mask
+
+
+def unpacked_float_dtype(dtype, scale_factor, add_offset):
+    """
+    Pick the float dtype xarray decodes a packed variable to.
+    
+    Args:
+        dtype (np.dtype): Stored dtype of the variable
+        scale_factor: The variable's scale_factor attribute, or None
+        add_offset: The variable's add_offset attribute, or None
+        
+    Returns:
+        type: numpy float type of the unpacked values
+    """
+    scale_type = np.dtype(type(scale_factor)) if scale_factor is not None else None
+    offset_type = np.dtype(type(add_offset)) if add_offset is not None else None
+    
+    # CF conforming packing: both attributes of the same float type, with
+    # int32 data widened to float64 so no precision is lost
+    if scale_type is not None and scale_type == offset_type and scale_type in (np.float32, np.float64):
+        if dtype.itemsize == 4 and np.issubdtype(dtype, np.integer):
+            return np.float64
+        return scale_type.type
+    # Any other offset could be large, so play safe
+    if offset_type is not None:
+        return np.float64
+    return scale_type.type
+
+
+def read_decoded_variable(nc_file, var_name):
+    """
+    Read a single variable as xarray's default decoding would return it.
+    
+    Only the one variable is read, without building an xarray Dataset for the
+    whole file. Values equal to _FillValue or missing_value become NaN, and
+    integer variables carrying either attribute are promoted to float; packed
+    variables are then unpacked with scale_factor and add_offset. This matches
+    the values and dtype of xr.open_dataset(...)[var_name].values for the
+    mask and scale decoding (time and other CF decoding are not applied).
+    
+    Args:
+        nc_file (Path): NetCDF file to read
+        var_name (str): Name of the variable
+        
+    Returns:
+        np.ndarray: Decoded variable data
+    """
+    with Dataset(nc_file, 'r') as nc:
+        var = nc.variables[var_name]
+        var.set_auto_maskandscale(False)
+        data = var[...]
+        var_attrs = var.ncattrs()
+        scale_factor = var.getncattr('scale_factor') if 'scale_factor' in var_attrs else None
+        add_offset = var.getncattr('add_offset') if 'add_offset' in var_attrs else None
+        valid_mask = None
+        if '_FillValue' in var_attrs or 'missing_value' in var_attrs:
+            valid_mask = retry_valid_mask(var, data)
+    
+    stored_dtype = data.dtype
+    if scale_factor is not None or add_offset is not None:
+        # Unpack in the float type xarray would use, masking fill cells first
+        data = data.astype(unpacked_float_dtype(stored_dtype, scale_factor, add_offset))
+        if valid_mask is not None:
+            np.copyto(data, np.nan, where=~valid_mask)
+        if scale_factor is not None:
+            data *= scale_factor
+        if add_offset is not None:
+            data += add_offset
+        return data
+    
+    if valid_mask is None:
+        return data
+    
+    # Same float width xarray picks when it has to make room for NaN
+    if not np.issubdtype(data.dtype, np.floating):
+        data = data.astype(np.float32 if data.dtype.itemsize <= 2 else np.float64)
+    np.copyto(data, np.nan, where=~valid_mask)
+    return data
+
+
+def valid_hyperslab(valid_mask):
+    """
+    Find the smallest hyperslab that contains every valid cell of a mask.
+    
+    Merging only this slab keeps the NetCDF read and write to one contiguous
+    block per variable that covers just the retried cells.
+    
+    Args:
+        valid_mask (np.ndarray): Boolean mask of cells to merge
+        
+    Returns:
+        tuple: Tuple of slices (one per axis), or None if no cell is valid.
+               A valid 0-dimensional mask gives Ellipsis (the whole scalar)
+    """
+    if valid_mask.ndim == 0:
+        return Ellipsis if valid_mask else None
+    
+    slab = []
+    for axis in range(valid_mask.ndim):
+        other_axes = tuple(a for a in range(valid_mask.ndim) if a != axis)
+        valid_along_axis = np.flatnonzero(valid_mask.any(axis=other_axes))
+        if valid_along_axis.size == 0:
+            return None
+        slab.append(slice(int(valid_along_axis[0]), int(valid_along_axis[-1]) + 1))
+    return tuple(slab)
+
+
+def link_or_copy(src, dst):
+    """
+    Hardlink src to dst, falling back to a full copy.
+    
+    A hardlink costs no data I/O, but dst then shares its contents with src,
+    so only use it for files that are never modified in place afterwards
+    (e.g. model inputs the retry run only reads).
+    Falls back to clone_file when linking is not possible, such as across
+    filesystems or when dst already exists.
+    
+    Args:
+        src (Path): File to link or copy
+        dst (Path): Destination path
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        clone_file(src, dst)
+
+
+def merge_output_file(retry_file, target_file, in_original):
+    """
+    Merge one output NetCDF file from the retry batch into the original batch.
+    
+    Runs in a worker process, so problems are reported through the return
+    value rather than printed.
+    
+    Args:
+        retry_file (Path): Output file from the retry batch
+        target_file (Path): File in the original batch output to merge into
+        in_original (bool): Whether the original batch already has this file
+        
+    Returns:
+        tuple: (file_name, warning) where warning is None if the file merged cleanly
+    """
+    # File doesn't exist in original, just copy retry file to target. This is
+    # a real copy (a reflink at most), never a hardlink: the two batches must
+    # not share an inode, or a later merge would write into its own source
+    if not in_original:
+        clone_file(retry_file, target_file)
+        return retry_file.name, None
+    
+    # An empty retry file means the run never wrote this output; copying it
+    # over the original data (the fallback below) would only destroy it
+    if retry_file.stat().st_size == 0:
+        return retry_file.name, f"Skipped empty retry file {retry_file.name}"
+    
+    # The merge goes into a copy of the target that is renamed over it once
+    # complete, so an interrupted merge never leaves a half-written original
+    temp_file = target_file.parent / f".{target_file.name}.tmp"
+    
+    try:
+        # Merge NetCDF files variable by variable: update values where retry
+        # has data, rewriting only those variables and leaving the rest of the
+        # file alone. The target is only copied and opened for writing once some
+        # variable has valid retry data, so a retry file holding nothing but
+        # fill leaves it untouched
+        with ExitStack() as stack:
+            nc_ret = stack.enter_context(Dataset(retry_file, 'r'))
+            nc_merged = None
+            
+            # Work on raw values so retry data is copied over exactly as
+            # stored; missing data is recognised by its fill value instead
+            nc_ret.set_auto_maskandscale(False)
+            
+            # Mask buffers sized for the largest variable, shared by all variables
+            # (each mask is consumed before the next variable is looked at)
+            max_size = max((var.size for var in nc_ret.variables.values()), default=0)
+            mask_buffer = np.empty(max_size, dtype=bool)
+            scratch_buffer = np.empty(max_size, dtype=bool)
+            
+            # For each data variable, update values where retry has valid data
+            # This is a simple merge: retry values overwrite merged where retry has data
+            for var_name, ret_var in nc_ret.variables.items():
+                if var_name in nc_ret.dimensions:
+                    continue  # Coordinate variable
+                
+                retry_data = ret_var[...]
+                
+                # Create mask for valid retry data (not NaN, not fill value).
+                # Scalars (0-dimensional) go through the same path: their
+                # slab is either the whole value or nothing
+                valid_mask = retry_valid_mask(ret_var, retry_data, out=mask_buffer, scratch=scratch_buffer)
+                
+                # Update merged data where retry has valid data, in one
+                # streaming pass without gathering retry_data[valid_mask].
+                # Only the slab holding valid cells is read and written back
+                slab = valid_hyperslab(valid_mask)
+                if slab is None:
+                    continue  # Nothing valid in retry for this variable
+                
+                if nc_merged is None:
+                    # A reflink where supported, so the copy costs no data I/O
+                    clone_file(target_file, temp_file)
+                    nc_merged = stack.enter_context(Dataset(temp_file, 'r+'))
+                    nc_merged.set_auto_maskandscale(False)
+                if var_name not in nc_merged.variables:
+                    continue  # Not in target
+                
+                merged_var = nc_merged.variables[var_name]
+                merged_data = merged_var[slab]
+                np.copyto(merged_data, retry_data[slab], casting='unsafe', where=valid_mask[slab])
+                merged_var[slab] = merged_data
+        
+        # Replace target file (a single atomic rename over the old file)
+        if nc_merged is not None:
+            os.replace(temp_file, target_file)
+    except Exception as e:
+        # The original target is still intact; drop any partial merge copy
+        temp_file.unlink(missing_ok=True)
+        # Fallback: just copy the retry file (nothing to copy if the target
+        # already is the retry file, e.g. hardlinked by an earlier merge)
+        try:
+            clone_file(retry_file, target_file)
+        except shutil.SameFileError:
+            pass
+        return retry_file.name, f"Could not merge {retry_file.name}: {e}"
+    
+    return retry_file.name, None
+
+
+def merge_retry_results(batch_path, retry_path, dry_run=False, atomic_write=True):
     """
     Merge results from retry batch directly into original batch.
     
@@ -712,6 +1220,8 @@ def merge_retry_results(batch_path, retry_path, dry_run=False):
         batch_path (Path): Path to the original batch directory
         retry_path (Path): Path to the retry batch directory
         dry_run (bool): If True, don't actually modify files
+        atomic_write (bool): If True, merge run_status.nc into a copy that is
+            renamed over the original; if False, update it in place
         
     Returns:
         tuple: (success, stats_dict) where stats_dict contains merge statistics
@@ -738,34 +1248,38 @@ def merge_retry_results(batch_path, retry_path, dry_run=False):
             print(f"Error: Original run_status.nc not found: {original_status_file}", file=sys.stderr)
             return False, {}
         
+        # Start both reads early; the retry file is not needed until later
+        prefetch_file(original_status_file)
+        prefetch_file(retry_status_file)
+        
         # Read original run_status
-        ds_original = xr.open_dataset(original_status_file, decode_times=False)
-        original_status = ds_original['run_status'].values.copy()
+        original_status = read_decoded_variable(original_status_file, 'run_status')
         
         # Read retry run_status
-        ds_retry = xr.open_dataset(retry_status_file, decode_times=False)
-        retry_status = ds_retry['run_status'].values
+        retry_status = read_decoded_variable(retry_status_file, 'run_status')
         
         # Validate shapes match
         if original_status.shape != retry_status.shape:
             print(f"Error: Shape mismatch between original and retry run_status!", file=sys.stderr)
             print(f"  Original shape: {original_status.shape}", file=sys.stderr)
             print(f"  Retry shape: {retry_status.shape}", file=sys.stderr)
-            ds_original.close()
-            ds_retry.close()
             return False, {}
         
         # Identify cells that became successful in retry
         # These are cells where retry_status == 100 and original_status != 100
-        newly_successful_mask = (retry_status == 100) & (original_status != 100)
-        newly_successful_count = int(np.sum(newly_successful_mask))
+        retry_success_mask = retry_status == 100
+        newly_successful_mask = retry_success_mask & (original_status != 100)
+        newly_successful_count = int(np.count_nonzero(newly_successful_mask))
         
-        # Count cells that were already successful
-        already_successful = int(np.sum((original_status == 100) & (retry_status == 100)))
+        # Count cells that were already successful (the rest of the retry successes)
+        already_successful = int(np.count_nonzero(retry_success_mask)) - newly_successful_count
         
-        # Count cells that failed in retry
-        retry_failed_mask = (retry_status != 100) & (retry_status != 0) & ~np.isnan(retry_status)
-        retry_failed = int(np.sum(retry_failed_mask))
+        # Count cells that failed in retry: not successful, not masked (0), not NaN
+        # (an integer status array cannot hold NaN, so the isnan pass is skipped)
+        retry_failed_mask = ~(retry_success_mask | (retry_status == 0))
+        if np.issubdtype(retry_status.dtype, np.floating):
+            retry_failed_mask &= ~np.isnan(retry_status)
+        retry_failed = int(np.count_nonzero(retry_failed_mask))
         
         # Get indices and status codes of failed cells for reporting
         # Limit to first 50 cells to avoid overwhelming output
@@ -787,9 +1301,6 @@ def merge_retry_results(batch_path, retry_path, dry_run=False):
                     'status': status_code_str
                 })
         
-        # Create mask for cells that failed in retry
-        retry_failed_mask = (retry_status != 100) & (retry_status != 0) & ~np.isnan(retry_status)
-        
         if dry_run:
             print(f"[DRY RUN] Would merge retry results directly into original batch: {batch_path}")
             print(f"  - Would update {newly_successful_count} newly successful cells")
@@ -804,8 +1315,6 @@ def merge_retry_results(batch_path, retry_path, dry_run=False):
             if retry_failed > 0:
                 print(f"  - Would create failed cells report: {batch_path / 'failed_cells_report.txt'}")
             
-            ds_original.close()
-            ds_retry.close()
             # Get failed cells info for dry run too
             failed_cells_info_dry = []
             if retry_failed > 0:
@@ -830,55 +1339,67 @@ def merge_retry_results(batch_path, retry_path, dry_run=False):
                 'report_file': None
             }
         
-        # Update merged run_status with successful cells from retry
-        merged_status = original_status.copy()
-        merged_status[newly_successful_mask] = 100
-        
-        # Create updated dataset from original
-        ds_updated = ds_original.copy()
-        ds_updated['run_status'].values[:] = merged_status
-        
         # Also merge other variables from retry (like total_runtime)
-        # Update values where retry has valid data (not masked, not fill value)
-        for var_name in ds_retry.data_vars:
-            if var_name == 'run_status':
-                continue  # Already handled above
+        # Collect the ones with valid data (not masked, not fill value); the
+        # rest are never read from the target
+        var_updates = []
+        with Dataset(retry_status_file, 'r') as nc_retry:
+            # Work on raw values so retry data is copied over exactly as stored
+            nc_retry.set_auto_maskandscale(False)
+            
+            # The masks are kept for the write below, but the comparison
+            # scratch buffer can be shared by all variables
+            max_size = max((var.size for var in nc_retry.variables.values()), default=0)
+            scratch_buffer = np.empty(max_size, dtype=bool)
             
-            if var_name in ds_updated.data_vars:
-                retry_var_data = ds_retry[var_name].values
-                merged_var_data = ds_updated[var_name].values
+            for var_name, retry_var in nc_retry.variables.items():
+                if var_name == 'run_status' or var_name in nc_retry.dimensions:
+                    continue  # Handled separately / coordinate variable
                 
-                # Create mask for valid retry data (not masked=0, not fill value)
-                if hasattr(ds_retry[var_name], '_FillValue'):
-                    fill_value = ds_retry[var_name]._FillValue
-                    # Valid where retry is not 0 (masked), not fill value, and not NaN (if float)
-                    if np.issubdtype(retry_var_data.dtype, np.floating):
-                        valid_mask = (retry_var_data != 0) & (retry_var_data != fill_value) & ~np.isnan(retry_var_data)
-                    else:
-                        valid_mask = (retry_var_data != 0) & (retry_var_data != fill_value)
-                else:
-                    # No fill value, just check not masked (0)
-                    if np.issubdtype(retry_var_data.dtype, np.floating):
-                        valid_mask = (retry_var_data != 0) & ~np.isnan(retry_var_data)
-                    else:
-                        valid_mask = (retry_var_data != 0)
+                retry_var_data = retry_var[...]
+                
+                # Create mask for valid retry data (not masked=0, not fill value, not NaN)
+                valid_mask = retry_valid_mask(retry_var, retry_var_data, exclude_zero=True, scratch=scratch_buffer)
+                
+                if valid_mask.any():
+                    var_updates.append((var_name, retry_var_data, valid_mask))
+        
+        # Only rewrite run_status.nc if the retry changes something. By default
+        # the merge goes into a copy of the target, updating only the merged
+        # variables in place, so run_status.nc is still swapped in as a whole.
+        # Without atomic_write the target is updated directly, saving the copy
+        # and rename where an interrupted merge can simply be rerun
+        if newly_successful_count > 0 or var_updates:
+            if atomic_write:
+                write_file = target_status_file.parent / f".{target_status_file.name}.tmp"
+                # A reflink where supported, so the copy costs no data I/O
+                clone_file(target_status_file, write_file)
+            else:
+                write_file = target_status_file
+            with Dataset(write_file, 'r+') as nc_updated:
+                nc_updated.set_auto_maskandscale(False)
+                
+                # Update merged run_status with successful cells from retry
+                if newly_successful_count > 0:
+                    status_var = nc_updated.variables['run_status']
+                    merged_status = status_var[...]
+                    # newly_successful_mask is a boolean grid of the same
+                    # shape, so this is a single masked store
+                    np.copyto(merged_status, 100, where=newly_successful_mask)
+                    status_var[...] = merged_status
                 
                 # Update merged data where retry has valid data
-                merged_var_data[valid_mask] = retry_var_data[valid_mask]
-                ds_updated[var_name].values[:] = merged_var_data
-        
-        # Close datasets before writing
-        ds_original.close()
-        ds_retry.close()
-        
-        # Write updated run_status.nc to target directory
-        temp_file = target_status_file.parent / f".{target_status_file.name}.tmp"
-        ds_updated.to_netcdf(temp_file)
-        ds_updated.close()
-        
-        # Replace target file
-        target_status_file.unlink()
-        temp_file.rename(target_status_file)
+                for var_name, retry_var_data, valid_mask in var_updates:
+                    if var_name in nc_updated.variables:
+                        merged_var = nc_updated.variables[var_name]
+                        slab = valid_hyperslab(valid_mask)
+                        merged_var_data = merged_var[slab]
+                        np.copyto(merged_var_data, retry_var_data[slab], casting='unsafe', where=valid_mask[slab])
+                        merged_var[slab] = merged_var_data
+            
+            # Replace target file (a single atomic rename over the old file)
+            if atomic_write:
+                os.replace(write_file, target_status_file)
         
         # Verify we wrote to the correct location
         if not target_status_file.exists():
@@ -897,107 +1418,39 @@ def merge_retry_results(batch_path, retry_path, dry_run=False):
         output_files_merged = 0
         if retry_output_dir.exists() and original_output_dir.exists():
             # Get list of NetCDF files in retry output
-            retry_output_files = list(retry_output_dir.glob("*.nc"))
+            # (skip run_status.nc as we already handled it)
+            retry_output_files = [f for f in retry_output_dir.glob("*.nc") if f.name != "run_status.nc"]
             
-            for retry_file in retry_output_files:
-                # Skip run_status.nc as we already handled it
-                if retry_file.name == "run_status.nc":
-                    continue
-                
-                original_file = original_output_dir / retry_file.name
-                target_file = target_output_dir / retry_file.name
-                
-                # If file exists in original, we need to merge the data
-                if original_file.exists():
-                    try:
-                        # Merge NetCDF files: update values where retry has data
-                        ds_merged = xr.open_dataset(target_file, decode_times=False)
-                        ds_ret = xr.open_dataset(retry_file, decode_times=False)
-                        
-                        # For each data variable, update values where retry has valid data
-                        # This is a simple merge: retry values overwrite merged where retry has data
-                        for var_name in ds_ret.data_vars:
-                            if var_name in ds_merged.data_vars:
-                                # Update values where retry has non-missing data
-                                retry_data = ds_ret[var_name].values
-                                merged_data = ds_merged[var_name].values
-                                
-                                # Check if data is scalar (0-dimensional)
-                                is_scalar = retry_data.ndim == 0
-                                
-                                if is_scalar:
-                                    # For scalar values, check if retry value is valid and replace
-                                    retry_dtype = retry_data.dtype
-                                    is_valid = True
-                                    
-                                    # Check validity based on dtype
-                                    if np.issubdtype(retry_dtype, np.floating):
-                                        # For floating point, check for NaN
-                                        if hasattr(ds_ret[var_name], '_FillValue'):
-                                            fill_value = ds_ret[var_name]._FillValue
-                                            is_valid = not np.isnan(retry_data) and (retry_data != fill_value)
-                                        else:
-                                            is_valid = not np.isnan(retry_data)
-                                    else:
-                                        # For integer types, check fill value
-                                        if hasattr(ds_ret[var_name], '_FillValue'):
-                                            fill_value = ds_ret[var_name]._FillValue
-                                            is_valid = (retry_data != fill_value)
-                                        # else: is_valid already True
-                                    
-                                    # Replace scalar value if valid
-                                    if is_valid:
-                                        ds_merged[var_name].values = retry_data
-                                else:
-                                    # For array data, use masking approach
-                                    # Create mask for valid retry data (not NaN, not fill value)
-                                    # Handle different data types appropriately
-                                    retry_dtype = retry_data.dtype
-                                    
-                                    # Check if dtype supports NaN (floating point types)
-                                    if np.issubdtype(retry_dtype, np.floating):
-                                        # For floating point, check for NaN
-                                        if hasattr(ds_ret[var_name], '_FillValue'):
-                                            fill_value = ds_ret[var_name]._FillValue
-                                            valid_mask = ~np.isnan(retry_data) & (retry_data != fill_value)
-                                        else:
-                                            valid_mask = ~np.isnan(retry_data)
-                                    else:
-                                        # For integer types, only check fill value
-                                        if hasattr(ds_ret[var_name], '_FillValue'):
-                                            fill_value = ds_ret[var_name]._FillValue
-                                            valid_mask = (retry_data != fill_value)
-                                        else:
-                                            # No fill value specified, assume all values are valid
-                                            valid_mask = np.ones_like(retry_data, dtype=bool)
-                                    
-                                    # Update merged data where retry has valid data
-                                    merged_data[valid_mask] = retry_data[valid_mask]
-                                    ds_merged[var_name].values[:] = merged_data
-                        
-                        # Write merged dataset
-                        temp_merge_file = target_file.parent / f".{target_file.name}.tmp"
-                        ds_merged.to_netcdf(temp_merge_file)
-                        ds_merged.close()
-                        ds_ret.close()
-                        
-                        # Replace target file
-                        target_file.unlink()
-                        temp_merge_file.rename(target_file)
-                        
-                        output_files_merged += 1
-                    except Exception as e:
-                        print(f"Warning: Could not merge {retry_file.name}: {e}", file=sys.stderr)
-                        # Fallback: just copy the retry file
-                        shutil.copy2(retry_file, target_file)
-                        output_files_merged += 1
-                else:
-                    # File doesn't exist in original, just copy retry file to target
-                    shutil.copy2(retry_file, target_file)
-                    output_files_merged += 1
+            # List the original outputs once instead of stat'ing each file
+            original_entries = scan_dir_entries(original_output_dir)
+            merge_jobs = [
+                (retry_file, target_output_dir / retry_file.name,
+                 entry_exists(original_entries.get(retry_file.name)))
+                for retry_file in retry_output_files
+            ]
+            
+            # Each file is merged independently, so spread them over worker
+            # processes (netCDF-C is not thread-safe, so processes, not threads)
+            workers = min(len(retry_output_files), os.cpu_count() or 1, 8)
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(merge_output_file, *job) for job in merge_jobs]
+                    results = [future.result() for future in futures]
+            else:
+                results = [merge_output_file(*job) for job in merge_jobs]
+            
+            # Report per-file warnings in one write rather than a print per file
+            warnings = [f"Warning: {warning}\n" for _, warning in results if warning]
+            if warnings:
+                sys.stderr.write("".join(warnings))
+            # Files that were skipped or fell back to a plain copy carry a
+            # warning and are not counted as merged
+            output_files_merged += len(results) - len(warnings)
             
             if output_files_merged > 0:
                 print(f"✓ Merged {output_files_merged} output file(s) to {target_output_dir}")
+            if warnings:
+                print(f"⚠ {len(warnings)} output file(s) were skipped or copied without merging (see warnings above)")
         
         # Create failed cells report if there are still failed cells
         report_file = None
@@ -1041,16 +1494,7 @@ def format_failed_cells_report(batch_path, failed_cells):
     
     # Extract batch number from path
     batch_name = batch_path.name
-    batch_match = re.search(r'batch[_-](\d+)', batch_name)
-    batch_num = batch_match.group(1) if batch_match else batch_name
-    
-    # Status code to name mapping
-    status_names = {
-        -100: "fail",
-        -5: "timeout",
-        -9999: "_FillValue",
-        'NaN': "not computed"
-    }
+    batch_num = extract_batch_num(batch_name, batch_name)
     
     lines = []
     lines.append(f"\nFailed Cells Report:")
@@ -1062,7 +1506,7 @@ def format_failed_cells_report(batch_path, failed_cells):
         y = cell['y']
         x = cell['x']
         status = cell['status']
-        status_name = status_names.get(status, "unknown")
+        status_name = STATUS_NAMES.get(status, "unknown")
         lines.append(f"  ({y:>5}, {x:>5})   {str(status):<9} {status_name}")
     
     return "\n".join(lines)
@@ -1093,25 +1537,22 @@ def submit_slurm_job(retry_path, dry_run=False):
     
     try:
         # Change to retry directory and submit the job
-        result = subprocess.run(
+        # Only stdout is needed on success; stderr is kept for the error report
+        output = subprocess.check_output(
             ['sbatch', 'slurm_runner.sh'],
             cwd=retry_path,
-            capture_output=True,
-            text=True,
-            check=True
+            stderr=subprocess.PIPE,
+            text=True
         )
         
         # Extract job ID from sbatch output (format: "Submitted batch job 12345")
-        job_id = None
-        if result.stdout:
-            match = re.search(r'(\d+)', result.stdout)
-            if match:
-                job_id = match.group(1)
+        match = SBATCH_JOB_ID_RE.search(output)
+        job_id = match.group(1) if match else None
         
         print(f"✓ Submitted slurm job")
         if job_id:
             print(f"  Job ID: {job_id}")
-        print(f"  Output: {result.stdout.strip()}")
+        print(f"  Output: {output.strip()}")
         
         return True, job_id
         
@@ -1138,48 +1579,48 @@ def print_summary(batch_path, stats, retry_path, dry_run=False):
         retry_path (Path): Path to the retry batch
         dry_run (bool): Whether this was a dry run
     """
-    print(f"\n{'='*80}")
-    print("SUMMARY")
-    print(f"{'='*80}")
-    print(f"Source batch: {batch_path}")
-    print(f"Retry batch: {retry_path}")
-    print()
-    print(f"Total cells in batch: {stats['total_cells']}")
-    print(f"Originally masked cells (status=0): {stats['masked_cells']}")
-    print(f"Successful cells (status=100): {stats['successful_cells']}")
-    print(f"Failed cells (total): {stats['failed_cells']}")
+    lines = []
+    lines.append(f"\n{'='*80}")
+    lines.append("SUMMARY")
+    lines.append(f"{'='*80}")
+    lines.append(f"Source batch: {batch_path}")
+    lines.append(f"Retry batch: {retry_path}")
+    lines.append("")
+    lines.append(f"Total cells in batch: {stats['total_cells']}")
+    lines.append(f"Originally masked cells (status=0): {stats['masked_cells']}")
+    lines.append(f"Successful cells (status=100): {stats['successful_cells']}")
+    lines.append(f"Failed cells (total): {stats['failed_cells']}")
     if stats['failed_cells'] != stats['failed_cells_to_retry']:
-        print(f"Failed cells that were supposed to run: {stats['failed_cells_to_retry']}")
-    print()
+        lines.append(f"Failed cells that were supposed to run: {stats['failed_cells_to_retry']}")
+    lines.append("")
     
     if stats['failed_cells'] > 0:
-        print("Failed cell status breakdown:")
-        for code, count in sorted(stats['failed_status_codes'].items(), key=lambda x: (isinstance(x[0], str), x[0])):
-            if code == 'NaN':
-                print(f"  Status NaN (not computed): {count} cells")
-            else:
-                status_name = {
-                    -100: "fail",
-                    -5: "timeout",
-                    -9999: "_FillValue"
-                }.get(code, "unknown")
-                print(f"  Status {code} ({status_name}): {count} cells")
-        print()
+        lines.append("Failed cell status breakdown:")
+        codes, counts = stats['failed_status_codes']
+        for code, count in zip(codes.tolist(), counts.tolist()):
+            status_name = STATUS_NAMES.get(code, "unknown")
+            lines.append(f"  Status {code} ({status_name}): {count} cells")
+        if stats['failed_nan_cells']:
+            lines.append(f"  Status NaN (not computed): {stats['failed_nan_cells']} cells")
+        lines.append("")
     
     if stats['failed_cells_to_retry'] == 0:
-        print("✓ No failed cells to retry - batch is already complete!")
+        lines.append("✓ No failed cells to retry - batch is already complete!")
         if not dry_run:
-            print("⚠ Note: Retry batch was still created but all cells are disabled.")
+            lines.append("⚠ Note: Retry batch was still created but all cells are disabled.")
     elif dry_run:
-        print(f"[DRY RUN] Would create retry batch with {stats['failed_cells_to_retry']} cells enabled")
+        lines.append(f"[DRY RUN] Would create retry batch with {stats['failed_cells_to_retry']} cells enabled")
     else:
-        print(f"✓ Retry batch created with {stats['failed_cells_to_retry']} cells enabled")
-        print()
-        print("To submit the retry batch:")
-        print(f"  cd {retry_path}")
-        print(f"  sbatch slurm_runner.sh  # or your submission command")
+        lines.append(f"✓ Retry batch created with {stats['failed_cells_to_retry']} cells enabled")
+        lines.append("")
+        lines.append("To submit the retry batch:")
+        lines.append(f"  cd {retry_path}")
+        lines.append(f"  sbatch slurm_runner.sh  # or your submission command")
     
-    print(f"{'='*80}")
+    lines.append(f"{'='*80}")
+    
+    # Written in one call rather than one print per line
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
@@ -1263,6 +1704,17 @@ Description:
         action='store_true',
         help='Remove #SBATCH --time lines from retry batch slurm script'
     )
+    parser.add_argument(
+        '--link-inputs',
+        action='store_true',
+        help='Hardlink input files into the retry batch instead of copying them '
+             '(saves space, but in-place edits to them also change the original batch)'
+    )
+    parser.add_argument(
+        '--no-atomic-write',
+        action='store_true',
+        help='With --merge, update run_status.nc in place instead of writing a copy and renaming it'
+    )
     
     args = parser.parse_args()
     
@@ -1289,7 +1741,9 @@ Description:
             sys.exit(1)
         
         print("Merging retry results...")
-        success, merge_stats = merge_retry_results(batch_path, retry_path, args.dry_run)
+        success, merge_stats = merge_retry_results(
+            batch_path, retry_path, args.dry_run, not args.no_atomic_write
+        )
         
         if not success:
             print("✗ Failed to merge retry results", file=sys.stderr)
@@ -1358,8 +1812,8 @@ Description:
     
     if stats['failed_cells'] > 0 and args.verbose:
         print(f"\n  Failed cell indices (Y, X):")
-        for idx in stats['failed_indices'][:10]:  # Show first 10
-            print(f"    {tuple(idx)}")
+        for idx in failed_indices_2d(stats, run_status.shape, limit=10):  # Show first 10
+            print(f"    {tuple(int(i) for i in idx)}")
         if len(stats['failed_indices']) > 10:
             print(f"    ... and {len(stats['failed_indices']) - 10} more")
     
@@ -1367,7 +1821,9 @@ Description:
     
     # Step 3: Create retry batch
     print("Step 3: Creating retry batch directory...")
-    success = create_retry_batch(batch_path, retry_path, args.force, args.dry_run)
+    success = create_retry_batch(
+        batch_path, retry_path, args.force, args.dry_run, args.link_inputs
+    )
     
     if not success:
         sys.exit(1)
@@ -1377,7 +1833,7 @@ Description:
     # Step 4: Update run-mask
     print("Step 4: Updating run-mask.nc...")
     success, cells_disabled, cells_enabled = update_retry_run_mask(
-        retry_path, run_status, run_mask, args.dry_run
+        retry_path, run_status, run_mask, args.dry_run, stats['status_masks']
     )
     
     if not success: